@@ -1,9 +1,14 @@
+import logging
+import os
 from datetime import datetime, timezone
 from typing import List, Any, Dict, Optional
 
 from fastapi import FastAPI, Header, Request
 from fastapi.responses import JSONResponse
 
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(name)s %(message)s")
+log = logging.getLogger("api_stub")
+
 app = FastAPI(title="Local Ingest Stub")
 
 @app.get("/health")
@@ -20,12 +25,10 @@ async def ingest(
     pig_id = body.get("Pig ID")
     notif_type = body.get("Notification Type")
 
-    print("\n=== INGEST ===")
-    print(f"Time: {now}")
-    print(f"Idempotency-Key: {idempotency_key}")
-    print(f"Pig ID: {pig_id}")
-    print(f"Notification Type: {notif_type}")
-
-    if isinstance(body, dict):
-        print("payload keys:", sorted(body.keys()))
+    log.info(
+        "ingest time=%s idempotency_key=%s pig_id=%s notif_type=%s",
+        now, idempotency_key, pig_id, notif_type,
+    )
+    if isinstance(body, dict) and log.isEnabledFor(logging.DEBUG):
+        log.debug("payload keys: %s", sorted(body.keys()))
     return JSONResponse({"ok": True})
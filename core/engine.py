@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
+from itertools import chain
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from operator import attrgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from core.models import GapPoint, POI, PigState, PosSample
 from core.repo import TelemetryRepo
@@ -10,6 +13,9 @@ from core.repo import TelemetryRepo
 
 UNKNOWN_ROUTE = "Unknown"
 
+_MIN15 = timedelta(minutes=15)
+_MIN30 = timedelta(minutes=30)
+
 
 @dataclass(frozen=True)
 class EngineConfig:
@@ -44,6 +50,11 @@ def _pos_m(sample: PosSample, gc_to_kp: Dict[int, float], meters_per_channel: in
     return None
 
 
+def _positions_m(samples: List[PosSample], gc_to_kp: Dict[int, float], meters_per_channel: int) -> List[Optional[float]]:
+    """Meters along line for every sample (aligned with samples), computed once per tick."""
+    return [_pos_m(s, gc_to_kp, meters_per_channel) for s in samples]
+
+
 def _poi_pos_m(poi: POI, gc_to_kp: Dict[int, float], meters_per_channel: int) -> Optional[float]:
     if poi.kp is not None:
         return poi.kp * 1000.0
@@ -55,22 +66,40 @@ def _poi_pos_m(poi: POI, gc_to_kp: Dict[int, float], meters_per_channel: int) ->
     return None
 
 
+_sample_dt = attrgetter("dt")
+
+
 def _current_sample(samples: List[PosSample]) -> Optional[PosSample]:
+    """Newest sample. Samples are sorted by dt ascending (TelemetryRepo contract).
+
+    Ties on dt resolve to the first of them, as max() over the samples would.
+    """
     if not samples:
         return None
-    return max(samples, key=lambda s: s.dt)
+    last = samples[-1]
+    if len(samples) > 1 and samples[-2].dt == last.dt:
+        return samples[bisect_left(samples, last.dt, key=_sample_dt)]
+    return last
 
 
 def pick_ref_sample_at_or_before(samples: List[PosSample], target_dt: datetime) -> Optional[PosSample]:
-    """Prefer dt <= target_dt and closest to it. Fallback: closest by absolute time distance."""
+    """Prefer dt <= target_dt and closest to it. Fallback: closest by absolute time distance.
+
+    samples must be sorted by dt ascending (as TelemetryRepo returns them): this is a binary
+    search, not a scan. Ties on dt resolve to the first of them, as min() over the samples would.
+    """
     if not samples:
         return None
 
-    older_or_equal = [s for s in samples if s.dt <= target_dt]
-    if older_or_equal:
-        return min(older_or_equal, key=lambda s: (target_dt - s.dt).total_seconds())
+    i = bisect_right(samples, target_dt, key=_sample_dt)
+    if i > 0:
+        found = samples[i - 1]
+        if i > 1 and samples[i - 2].dt == found.dt:
+            return samples[bisect_left(samples, found.dt, 0, i, key=_sample_dt)]
+        return found
 
-    return min(samples, key=lambda s: abs((s.dt - target_dt).total_seconds()))
+    # everything is newer than target_dt -> the oldest one is the closest
+    return samples[0]
 
 
 def speed_mps_by_ref(cur: PosSample, ref: PosSample, gc_to_kp: Dict[int, float], cfg: EngineConfig) -> float:
@@ -79,7 +108,12 @@ def speed_mps_by_ref(cur: PosSample, ref: PosSample, gc_to_kp: Dict[int, float],
         return 0.0
     p_cur = _pos_m(cur, gc_to_kp, cfg.meters_per_channel)
     p_ref = _pos_m(ref, gc_to_kp, cfg.meters_per_channel)
-    if p_cur is None or p_ref is None:
+    return _speed_mps(p_cur, p_ref, dt_s)
+
+
+def _speed_mps(p_cur: Optional[float], p_ref: Optional[float], dt_s: float) -> float:
+    """Speed from two positions (meters) dt_s seconds apart; 0.0 when unknown."""
+    if dt_s <= 0 or p_cur is None or p_ref is None:
         return 0.0
     return abs(p_cur - p_ref) / dt_s
 
@@ -101,6 +135,60 @@ def _build_routes(pois: List[POI]) -> Dict[str, List[POI]]:
     return routes
 
 
+def _route_positions_m(route: List[POI], gc_to_kp: Dict[int, float], meters_per_channel: int) -> List[Optional[float]]:
+    """POI positions in meters, aligned with the (sorted) route list. Computed once per route."""
+    return [_poi_pos_m(p, gc_to_kp, meters_per_channel) for p in route]
+
+
+@dataclass(frozen=True)
+class _RouteIndex:
+    """Precomputed POI positions for one sorted route (built once per Engine)."""
+    pos: List[Optional[float]]   # aligned with the route list, None when unknown
+    known_pos: List[float]       # known positions, in route order
+    known_idx: List[int]         # route index of each known position
+    monotone: bool               # known_pos is non-decreasing -> bisect is valid
+
+
+def _route_index(pos: List[Optional[float]]) -> _RouteIndex:
+    known_idx = [i for i, pm in enumerate(pos) if pm is not None]
+    known_pos = [pos[i] for i in known_idx]
+    monotone = all(a <= b for a, b in zip(known_pos, known_pos[1:]))
+    return _RouteIndex(pos=pos, known_pos=known_pos, known_idx=known_idx, monotone=monotone)
+
+
+_EMPTY_ROUTE_INDEX = _route_index([])
+
+
+@dataclass(frozen=True)
+class _GapIndex:
+    """One route's gaps sorted by position (built once per Engine)."""
+    pos: List[float]        # gap positions in meters, ascending
+    gaps: List[GapPoint]    # aligned with pos
+    order: List[int]        # original (file) index of each gap, for tie-breaking
+
+
+def _gap_index(gaps: List[GapPoint]) -> _GapIndex:
+    ranked = sorted(range(len(gaps)), key=lambda i: (gaps[i].kp, i))
+    return _GapIndex(
+        pos=[gaps[i].kp * 1000.0 for i in ranked],
+        gaps=[gaps[i] for i in ranked],
+        order=ranked,
+    )
+
+
+def _near_gaps(gi: _GapIndex, cur_m: Optional[float], tol: float) -> List[GapPoint]:
+    """Gaps that may be within tol of cur_m, in original order.
+
+    The bisect window is widened by one on each side so the exact tolerance test stays with the caller.
+    """
+    if cur_m is None or not gi.pos:
+        return []
+    lo = max(bisect_left(gi.pos, cur_m - tol) - 1, 0)
+    hi = bisect_right(gi.pos, cur_m + tol) + 1
+    picked = sorted(range(lo, min(hi, len(gi.pos))), key=gi.order.__getitem__)
+    return [gi.gaps[i] for i in picked]
+
+
 def _route_range_m(route: List[POI], gc_to_kp: Dict[int, float], cfg: EngineConfig) -> Tuple[Optional[float], Optional[float]]:
     vals: List[float] = []
     for p in route:
@@ -112,6 +200,19 @@ def _route_range_m(route: List[POI], gc_to_kp: Dict[int, float], cfg: EngineConf
     return (min(vals), max(vals))
 
 
+def _route_ranges_m(routes: Dict[str, List[POI]], gc_to_kp: Dict[int, float], cfg: EngineConfig) -> Dict[str, Tuple[float, float]]:
+    """(min_m, max_m) per route that can be picked (named, with at least one known POI position)."""
+    out: Dict[str, Tuple[float, float]] = {}
+    for name, route in routes.items():
+        if name == UNKNOWN_ROUTE:
+            continue
+        rmin_m, rmax_m = _route_range_m(route, gc_to_kp, cfg)
+        if rmin_m is None or rmax_m is None:
+            continue
+        out[name] = (rmin_m, rmax_m)
+    return out
+
+
 def pick_legacy_route(
     state: PigState,
     routes: Dict[str, List[POI]],
@@ -126,6 +227,19 @@ def pick_legacy_route(
     - If nothing matches -> Unknown (do not lock).
     - If Completed -> allow re-pick / unlock.
     """
+    cur_m = _pos_m(cur, gc_to_kp, cfg.meters_per_channel)
+    route_ranges = _route_ranges_m(routes, gc_to_kp, cfg)
+    return _pick_legacy_route_m(state, routes, route_ranges, cur_m, float(cfg.poi_tol_meters), pig_event)
+
+
+def _pick_legacy_route_m(
+    state: PigState,
+    routes: Dict[str, List[POI]],
+    route_ranges: Dict[str, Tuple[float, float]],
+    cur_m: Optional[float],
+    tol_m: float,
+    pig_event: str,
+) -> str:
     locked = state.locked_legacy_route
     if locked and locked != UNKNOWN_ROUTE and pig_event != "Completed":
         # If routes were reloaded and the key disappeared, fall back to Unknown and re-pick.
@@ -133,24 +247,19 @@ def pick_legacy_route(
             return locked
         state.locked_legacy_route = None
 
-    cur_m = _pos_m(cur, gc_to_kp, cfg.meters_per_channel)
     if cur_m is None:
         return UNKNOWN_ROUTE
 
-    tol_m = float(cfg.poi_tol_meters)
-    candidates: List[Tuple[float, str]] = []
+    picked = UNKNOWN_ROUTE
+    best_w = float("inf")
 
-    for name, route in routes.items():
-        if name == UNKNOWN_ROUTE:
-            continue
-        rmin_m, rmax_m = _route_range_m(route, gc_to_kp, cfg)
-        if rmin_m is None or rmax_m is None:
-            continue
+    for name, (rmin_m, rmax_m) in route_ranges.items():
         if (rmin_m - tol_m) <= cur_m <= (rmax_m + tol_m):
-            # pick the narrowest range as the most specific route
-            candidates.append((rmax_m - rmin_m, name))
+            # pick the narrowest range as the most specific route; ties go to the smaller name
+            w = rmax_m - rmin_m
+            if w < best_w or (w == best_w and name < picked):
+                best_w, picked = w, name
 
-    picked = min(candidates)[1] if candidates else UNKNOWN_ROUTE
     if picked != UNKNOWN_ROUTE:
         state.locked_legacy_route = picked
     return picked
@@ -164,48 +273,57 @@ def find_prev_next_end(
 ) -> Tuple[Optional[POI], Optional[POI], Optional[POI]]:
     if not route:
         return (None, None, None)
-
+    ri = _route_index(_route_positions_m(route, gc_to_kp, cfg.meters_per_channel))
     cur_m = _pos_m(cur, gc_to_kp, cfg.meters_per_channel)
-    if cur_m is None:
-        return (None, None, route[-1])
+    return _find_prev_next_end_m(route, ri, cur_m, cfg.poi_tol_meters)
 
-    prev: Optional[POI] = None
-    nextp: Optional[POI] = None
 
-    for p in route:
-        pm = _poi_pos_m(p, gc_to_kp, cfg.meters_per_channel)
+def _prev_next_idx(ri: _RouteIndex, cur_m: float, tol: float) -> Tuple[int, int]:
+    """Route indices of prev/next POI; -1 means not found.
+
+    prev = last POI behind or within tol of cur_m, next = first POI beyond cur_m + tol.
+    Binary search when positions are sorted; otherwise a forward scan in route order.
+    """
+    upper = cur_m + tol
+    if ri.monotone:
+        k = bisect_right(ri.known_pos, upper)
+        prev_i = ri.known_idx[k - 1] if k > 0 else -1
+        next_i = ri.known_idx[k] if k < len(ri.known_idx) else -1
+        return (prev_i, next_i)
+
+    prev_i = -1
+    next_i = -1
+    for i, pm in enumerate(ri.pos):
         if pm is None:
             continue
-
-        if pm < cur_m - cfg.poi_tol_meters:
-            prev = p
-        elif abs(pm - cur_m) <= cfg.poi_tol_meters:
-            prev = p
-        elif pm > cur_m + cfg.poi_tol_meters:
-            nextp = p
+        if pm > upper:
+            next_i = i
             break
-
-    return (prev, nextp, route[-1])
+        prev_i = i
+    return (prev_i, next_i)
 
 
-def _is_close_to_poi(cur: PosSample, poi: POI, gc_to_kp: Dict[int, float], cfg: EngineConfig) -> bool:
-    cur_m = _pos_m(cur, gc_to_kp, cfg.meters_per_channel)
+def _find_prev_next_end_m(
+    route: List[POI],
+    ri: _RouteIndex,
+    cur_m: Optional[float],
+    tol: float,
+) -> Tuple[Optional[POI], Optional[POI], Optional[POI]]:
+    if not route:
+        return (None, None, None)
     if cur_m is None:
-        return False
-
-    trg_m = _poi_pos_m(poi, gc_to_kp, cfg.meters_per_channel)
-    if trg_m is None:
-        return False
+        return (None, None, route[-1])
 
-    return abs(cur_m - trg_m) <= cfg.poi_tol_meters
+    prev_i, next_i = _prev_next_idx(ri, cur_m, tol)
+    prev = route[prev_i] if prev_i >= 0 else None
+    nextp = route[next_i] if next_i >= 0 else None
+    return (prev, nextp, route[-1])
 
 
-def _is_close_to_gap(cur: PosSample, gap: GapPoint, gc_to_kp: Dict[int, float], cfg: EngineConfig) -> bool:
-    cur_m = _pos_m(cur, gc_to_kp, cfg.meters_per_channel)
-    if cur_m is None:
+def _is_close_to_poi(cur_m: Optional[float], trg_m: Optional[float], tol_m: float) -> bool:
+    if cur_m is None or trg_m is None:
         return False
-    gap_m = gap.kp * 1000.0
-    return abs(cur_m - gap_m) <= cfg.poi_tol_meters
+    return abs(cur_m - trg_m) <= tol_m
 
 
 def infer_pig_event(
@@ -214,20 +332,52 @@ def infer_pig_event(
     gc_to_kp: Dict[int, float],
     cfg: EngineConfig,
 ) -> str:
-    """Moving/Stopped based on last 5 minutes; Completed if near last POI."""
+    """Moving/Stopped based on last 5 minutes; Completed if near last POI.
+
+    recent_samples must be sorted by dt ascending (as TelemetryRepo returns them).
+    """
     cur = _current_sample(recent_samples)
     if cur is None:
         return "Not Detected"
 
-    if route_end_poi and _is_close_to_poi(cur, route_end_poi, gc_to_kp, cfg):
+    cur_m = _pos_m(cur, gc_to_kp, cfg.meters_per_channel)
+    positions = _positions_m(recent_samples, gc_to_kp, cfg.meters_per_channel)
+    end_m = _poi_pos_m(route_end_poi, gc_to_kp, cfg.meters_per_channel) if route_end_poi else None
+    return _infer_pig_event_m(cur_m, positions, end_m, float(cfg.poi_tol_meters))
+
+
+def _infer_pig_event_m(
+    cur_m: Optional[float],
+    positions: Iterable[Optional[float]],
+    end_m: Optional[float],
+    tol_m: float,
+) -> str:
+    """Same as infer_pig_event, on positions already converted to meters.
+
+    positions may be lazy: the scan stops as soon as the span exceeds tol_m.
+    """
+    if _is_close_to_poi(cur_m, end_m, tol_m):
         return "Completed"
 
-    vals = [v for v in (_pos_m(s, gc_to_kp, cfg.meters_per_channel) for s in recent_samples) if v is not None]
-    if len(vals) < 2:
+    # one pass: running min/max over known positions
+    n = 0
+    lo = hi = 0.0
+    for v in positions:
+        if v is None:
+            continue
+        if n == 0:
+            lo = hi = v
+        elif v < lo:
+            lo = v
+        elif v > hi:
+            hi = v
+        n += 1
+        if hi - lo > tol_m:
+            # span only grows: already Moving (and n >= 2)
+            return "Moving"
+    if n < 2:
         return "Not Detected"
-
-    span = max(vals) - min(vals)
-    return "Stopped" if span <= cfg.poi_tol_meters else "Moving"
+    return "Stopped"
 
 
 def eta_from_to(cur: PosSample, target: POI, speed: float, gc_to_kp: Dict[int, float], cfg: EngineConfig) -> Optional[datetime]:
@@ -236,14 +386,18 @@ def eta_from_to(cur: PosSample, target: POI, speed: float, gc_to_kp: Dict[int, f
 
     cur_m = _pos_m(cur, gc_to_kp, cfg.meters_per_channel)
     trg_m = _poi_pos_m(target, gc_to_kp, cfg.meters_per_channel)
-    if cur_m is None or trg_m is None:
+    return _eta_m(cur.dt, cur_m, trg_m, speed)
+
+
+def _eta_m(cur_dt: datetime, cur_m: Optional[float], trg_m: Optional[float], speed: float) -> Optional[datetime]:
+    if speed <= 0 or cur_m is None or trg_m is None:
         return None
 
     dist_m = trg_m - cur_m
     if dist_m < 0:
         return None
 
-    return cur.dt + timedelta(seconds=(dist_m / speed))
+    return cur_dt + timedelta(seconds=(dist_m / speed))
 
 
 def infer_notification_type(
@@ -260,38 +414,72 @@ def infer_notification_type(
     cfg: EngineConfig,
 ) -> str:
     """Priority: Completion > POI Passage > Gap > pre-POI > 30-min update."""
-    now = cur.dt
+    mpc = cfg.meters_per_channel
+    return _infer_notification_type_m(
+        state=state,
+        pig_event=pig_event,
+        now=cur.dt,
+        cur_m=_pos_m(cur, gc_to_kp, mpc),
+        legacy_route=legacy_route,
+        poi_positions=[_poi_pos_m(p, gc_to_kp, mpc) for p in route],
+        next_poi=next_poi,
+        end_m=_poi_pos_m(end_poi, gc_to_kp, mpc) if end_poi else None,
+        gaps=gaps,
+        eta_next=eta_next,
+        tol=float(cfg.poi_tol_meters),
+        prepoi_window=timedelta(seconds=cfg.prepoi_time_window_sec),
+    )
+
+
+def _infer_notification_type_m(
+    state: PigState,
+    pig_event: str,
+    now: datetime,
+    cur_m: Optional[float],
+    legacy_route: str,
+    poi_positions: Iterable[Optional[float]],
+    next_poi: Optional[POI],
+    end_m: Optional[float],
+    gaps: List[GapPoint],
+    eta_next: Optional[datetime],
+    tol: float,
+    prepoi_window: timedelta,
+) -> str:
+    """Same as infer_notification_type, on positions already converted to meters.
 
+    poi_positions: positions of the route POIs to check for a passage; the engine passes only
+    the POIs bracketing cur when the route is sorted by position.
+    """
     # 1) Completion
     if pig_event == "Completed":
         return "Run Completion"
-    if end_poi and _is_close_to_poi(cur, end_poi, gc_to_kp, cfg):
+    if _is_close_to_poi(cur_m, end_m, tol):
         return "Run Completion"
 
-    # 2) POI Passage
-    for p in route:
-        if _is_close_to_poi(cur, p, gc_to_kp, cfg):
-            return "POI Passage"
+    if cur_m is not None:
+        # 2) POI Passage
+        for pm in poi_positions:
+            if pm is not None and abs(cur_m - pm) <= tol:
+                return "POI Passage"
 
-    # 3) Gap Start/End
-    for g in gaps:
-        if g.legacy_route != legacy_route:
-            continue
-        if _is_close_to_gap(cur, g, gc_to_kp, cfg):
-            return "Gap Start" if g.kind == "start" else "Gap End"
+        # 3) Gap Start/End (gap kp -> meters inline)
+        for g in gaps:
+            if g.legacy_route != legacy_route:
+                continue
+            if -tol <= cur_m - g.kp * 1000.0 <= tol:
+                return "Gap Start" if g.kind == "start" else "Gap End"
 
     # 4) pre-POI
     if eta_next and next_poi:
-        t15 = eta_next - timedelta(minutes=15)
-        t30 = eta_next - timedelta(minutes=30)
-        win = cfg.prepoi_time_window_sec
+        t15 = eta_next - _MIN15
+        t30 = eta_next - _MIN30
 
-        if abs((now - t15).total_seconds()) <= win:
+        if abs(now - t15) <= prepoi_window:
             if state.fired_pre15_for_tag != next_poi.tag:
                 state.fired_pre15_for_tag = next_poi.tag
                 return "15 Min Upstream - Station"
 
-        if abs((now - t30).total_seconds()) <= win:
+        if abs(now - t30) <= prepoi_window:
             if state.fired_pre30_for_tag != next_poi.tag:
                 state.fired_pre30_for_tag = next_poi.tag
                 return "30 Min Upstream - Station"
@@ -306,13 +494,18 @@ def infer_notification_type(
         state.last_notif_at = now
         return "30 Min Update"
 
-    if (now - state.last_notif_at) >= timedelta(minutes=30):
+    if (now - state.last_notif_at) >= _MIN30:
         state.last_notif_at = now
         return "30 Min Update"
 
     return ""
 
 
+def _fmt_ts(dt: datetime) -> str:
+    """Same output as dt.strftime("%d-%m-%y %H%M%S"), without strftime's format parsing."""
+    return f"{dt.day:02d}-{dt.month:02d}-{dt.year % 100:02d} {dt.hour:02d}{dt.minute:02d}{dt.second:02d}"
+
+
 def build_payload(
     pig_id: str,
     tool_type: str,
@@ -328,22 +521,24 @@ def build_payload(
     current_kp: Optional[float],
     time: datetime,
 ) -> Dict[str, Any]:
+    prev_type, prev_tag = (prev_poi.valve_type, prev_poi.tag) if prev_poi else ("", "")
+    next_type, next_tag = (next_poi.valve_type, next_poi.tag) if next_poi else ("", "")
     return {
         "Pig ID": pig_id,
         "Tool Type": tool_type,
         "Pig Event": pig_event,
         "Notification Type": notif_type,
         "Speed": f"{speed_mps:.2f}",
-        "Previous Valve Type": (prev_poi.valve_type if prev_poi else ""),
-        "Previous Valve Tag": (prev_poi.tag if prev_poi else ""),
-        "Next Valve Type": (next_poi.valve_type if next_poi else ""),
-        "Next Valve Tag": (next_poi.tag if next_poi else ""),
-        "ETA to the Next Valve": eta_next.strftime("%d-%m-%y %H%M%S") if eta_next else "",
-        "ETA to the End": eta_end.strftime("%d-%m-%y %H%M%S") if eta_end else "",
+        "Previous Valve Type": prev_type,
+        "Previous Valve Tag": prev_tag,
+        "Next Valve Type": next_type,
+        "Next Valve Tag": next_tag,
+        "ETA to the Next Valve": _fmt_ts(eta_next) if eta_next else "",
+        "ETA to the End": _fmt_ts(eta_end) if eta_end else "",
         "Legacy Route": legacy_route,
         "Current Global Channel": str(current_gc) if current_gc is not None else "",
         "Current KP": f"{current_kp:.3f}" if current_kp is not None else "",
-        "Timestamp": time.strftime("%d-%m-%y %H%M%S"),
+        "Timestamp": _fmt_ts(time),
     }
 
 
@@ -352,30 +547,133 @@ class Engine:
         self.repo = repo
         self.cfg = cfg or EngineConfig()
 
+        # Config is frozen: build the window timedeltas once instead of per tick.
+        c = self.cfg
+        self._stopped_window = timedelta(seconds=c.stopped_window_sec)
+        self._speed_search = timedelta(seconds=c.speed_search_sec)
+        self._speed_window = timedelta(seconds=c.speed_window_sec)
+        self._speed_short_window = timedelta(seconds=c.speed_short_window_sec)
+        self._moving_boost = timedelta(seconds=c.moving_boost_sec)
+        self._min_speed_dt = timedelta(seconds=c.min_speed_dt_sec)
+        self._prepoi_window = timedelta(seconds=c.prepoi_time_window_sec)
+        self._lookback = max(self._stopped_window, self._speed_search)
+        # ...and unpack the scalars the per-tick helpers take directly.
+        self._mpc = c.meters_per_channel
+        self._tol = float(c.poi_tol_meters)
+
         # Load once at startup
+        self.reload()
+
+    def reload(self) -> None:
+        """Re-read POIs, gaps and the GC->KP table from the repo and rebuild derived lookups.
+
+        Reference data is cached for the Engine's lifetime; call this after it changes.
+        """
         self._gc_to_kp = self.repo.get_gc_to_kp()
         self._pois = self.repo.get_pois()
         self._gaps = self.repo.get_gaps()
         self._routes = _build_routes(self._pois)
 
+        # POI positions never change after load: convert once, keyed by id(poi).
+        mpc = self._mpc
+        self._poi_pos: Dict[int, Optional[float]] = {
+            id(p): _poi_pos_m(p, self._gc_to_kp, mpc) for p in self._pois
+        }
+        self._route_ranges = _route_ranges_m(self._routes, self._gc_to_kp, self.cfg)
+        self._route_index = {
+            name: _route_index([self._poi_pos[id(p)] for p in route])
+            for name, route in self._routes.items()
+        }
+        # Gaps only ever match the pig's own route: group them once...
+        gaps_by_route: Dict[str, List[GapPoint]] = {}
+        for g in self._gaps:
+            gaps_by_route.setdefault(g.legacy_route, []).append(g)
+        # ...and sort each group by position so a tick only looks at the gaps around cur.
+        self._gap_index = {name: _gap_index(gs) for name, gs in gaps_by_route.items()}
+
     def process_pig(self, pig_id: str, tool_type: str, now: datetime) -> Dict[str, Any]:
-        cfg = self.cfg
-        gc_to_kp = self._gc_to_kp
-        gaps = self._gaps
-        routes = self._routes
+        state = self.repo.get_state(pig_id)
+
+        # One fetch covering both windows; samples are time-ordered, so each window is a suffix.
+        history = self.repo.get_recent_positions(pig_id, since_dt=now - self._lookback)
+        recent, speed_samples = self._windows(history, now)
+
+        payload, updated = self._evaluate(pig_id, tool_type, now, state, recent, speed_samples)
+        if updated:
+            self.repo.save_state(pig_id, state)
+        return payload
+
+    def process_pigs(self, pigs: List[Tuple[str, str]], now: datetime) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """process_pig for many (pig_id, tool_type) pairs at the same `now`, with one telemetry fetch.
+
+        Yields (pig_id, payload) lazily: each pig's state is saved only when the caller asks
+        for it, so the caller can enqueue that pig's notification before the next pig advances.
+        """
+        if not pigs:
+            return
+        histories = self.repo.get_recent_positions_batch([pig_id for pig_id, _ in pigs], since_dt=now - self._lookback)
+
+        for pig_id, tool_type in pigs:
+            state = self.repo.get_state(pig_id)
+            recent, speed_samples = self._windows(histories.get(pig_id, []), now)
+            payload, updated = self._evaluate(pig_id, tool_type, now, state, recent, speed_samples)
+            if updated:
+                self.repo.save_state(pig_id, state)
+            yield pig_id, payload
+
+    def _windows(self, history: List[PosSample], now: datetime) -> Tuple[List[PosSample], List[PosSample]]:
+        # 1) last 5 minutes -> Moving/Stopped
+        recent = history[bisect_left(history, now - self._stopped_window, key=_sample_dt):]
+        # 2) longer history -> speed/ETA (need ref around now-25m)
+        speed_samples = history[bisect_left(history, now - self._speed_search, key=_sample_dt):]
+        return recent, speed_samples
+
+    def process_pig_batch(self, pig_id: str, tool_type: str, now_list: List[datetime]) -> List[Dict[str, Any]]:
+        """Replay several ticks for one pig: one state load/save and one telemetry fetch.
+
+        now_list must be sorted ascending. Each tick only sees samples with dt <= now,
+        i.e. what a live process_pig call at that time would have seen.
+        """
+        if not now_list:
+            return []
 
         state = self.repo.get_state(pig_id)
+        history = self.repo.get_recent_positions(pig_id, since_dt=now_list[0] - self._lookback)
+
+        out: List[Dict[str, Any]] = []
+        any_updated = False
+        for now in now_list:
+            hi = bisect_right(history, now, key=_sample_dt)
+            lo_move = bisect_left(history, now - self._stopped_window, key=_sample_dt)
+            lo_speed = bisect_left(history, now - self._speed_search, key=_sample_dt)
+            payload, updated = self._evaluate(
+                pig_id, tool_type, now, state, history[lo_move:hi], history[lo_speed:hi]
+            )
+            any_updated = any_updated or updated
+            out.append(payload)
+
+        if any_updated:
+            self.repo.save_state(pig_id, state)
+        return out
+
+    def _evaluate(
+        self,
+        pig_id: str,
+        tool_type: str,
+        now: datetime,
+        state: PigState,
+        recent: List[PosSample],
+        speed_samples: List[PosSample],
+    ) -> Tuple[Dict[str, Any], bool]:
+        """One tick over already-fetched samples. Mutates state; returns (payload, state_updated)."""
+        gc_to_kp = self._gc_to_kp
+        routes = self._routes
+        poi_pos = self._poi_pos
+        mpc = self._mpc
+        tol = self._tol
 
         default_tool_type = "Cleaning Tool"
         # effective_tool = (getattr(state, "locked_tool_type", None) or (tool_type.strip() if tool_type else "") or default_tool_type)
-        
-        # 1) last 5 minutes -> Moving/Stopped
-        since_move = now - timedelta(seconds=cfg.stopped_window_sec)
-        recent = self.repo.get_recent_positions(pig_id, since_dt=since_move)
-
-        # 2) longer history -> speed/ETA (need ref around now-25m)
-        since_speed = now - timedelta(seconds=cfg.speed_search_sec)
-        speed_samples = self.repo.get_recent_positions(pig_id, since_dt=since_speed)
 
         cur = _current_sample(speed_samples) or _current_sample(recent)
         telemtry_tool = (cur.tool_type or "").strip() if getattr(cur, "tool_type", None) else ""
@@ -386,7 +684,7 @@ class Engine:
             effective_tool = default_tool_type
 
         if cur is None:
-            return build_payload(
+            payload = build_payload(
                 pig_id=pig_id,
                 tool_type=effective_tool,
                 pig_event="Not Detected",
@@ -401,13 +699,30 @@ class Engine:
                 current_kp=None,
                 time=now,
             )
+            return payload, False
+
+        # Convert positions to meters once per tick and reuse below.
+        cur_m = _pos_m(cur, gc_to_kp, mpc)
 
         # --- Legacy route (simple + sticky) ---
-        legacy = pick_legacy_route(state, routes, cur, gc_to_kp, cfg, pig_event="Moving")
+        legacy = _pick_legacy_route_m(state, routes, self._route_ranges, cur_m, tol, pig_event="Moving")
         route = routes.get(legacy, [])
-        prev_poi, next_poi, end_poi = find_prev_next_end(route, cur, gc_to_kp, cfg)
-
-        raw_event = infer_pig_event(recent, end_poi, gc_to_kp, cfg)
+        route_idx = self._route_index.get(legacy, _EMPTY_ROUTE_INDEX)
+        prev_poi, next_poi, end_poi = _find_prev_next_end_m(route, route_idx, cur_m, tol)
+
+        if recent:
+            recent_cur = _current_sample(recent)
+            recent_cur_m = cur_m if recent_cur is cur else _pos_m(recent_cur, gc_to_kp, mpc)
+            # Newest first, then oldest onward: a moving pig exceeds tol within the first couple of values.
+            # (recent_cur is not necessarily recent[-1] when the newest dt is duplicated.)
+            recent_m = chain(
+                (recent_cur_m,),
+                (_pos_m(s, gc_to_kp, mpc) for s in recent if s is not recent_cur),
+            )
+            end_m = poi_pos[id(end_poi)] if end_poi else None
+            raw_event = _infer_pig_event_m(recent_cur_m, recent_m, end_m, tol)
+        else:
+            raw_event = "Not Detected"
         pig_event = raw_event
 
         # Transition tracking for speed window (Stopped -> Moving)
@@ -439,48 +754,54 @@ class Engine:
         else:
             use_short = False
             if state.moving_started_at is not None:
-                if (cur.dt - state.moving_started_at).total_seconds() < cfg.moving_boost_sec:
+                if (cur.dt - state.moving_started_at) < self._moving_boost:
                     use_short = True
 
-            window_sec = cfg.speed_short_window_sec if use_short else cfg.speed_window_sec
-            target_dt = cur.dt - timedelta(seconds=window_sec)
+            target_dt = cur.dt - (self._speed_short_window if use_short else self._speed_window)
 
             pool = speed_samples
             if use_short and state.moving_started_at is not None:
-                filtered = [s for s in speed_samples if s.dt >= state.moving_started_at]
-                if filtered:
-                    pool = filtered
+                # samples are time-ordered: the ones since moving_started_at are a suffix
+                i = bisect_left(speed_samples, state.moving_started_at, key=_sample_dt)
+                if i < len(speed_samples):
+                    pool = speed_samples[i:]
 
             ref = pick_ref_sample_at_or_before(pool, target_dt)
 
             spd = 0.0
-            if ref is not None and (cur.dt - ref.dt).total_seconds() >= cfg.min_speed_dt_sec:
-                spd = speed_mps_by_ref(cur, ref, gc_to_kp, cfg)
+            if ref is not None:
+                age = cur.dt - ref.dt
+                if age >= self._min_speed_dt:
+                    spd = _speed_mps(cur_m, _pos_m(ref, gc_to_kp, mpc), age.total_seconds())
 
-            eta_next = eta_from_to(cur, next_poi, spd, gc_to_kp, cfg) if (next_poi and spd > 0) else None
-            eta_end = eta_from_to(cur, end_poi, spd, gc_to_kp, cfg) if (end_poi and spd > 0) else None
+            eta_next = _eta_m(cur.dt, cur_m, poi_pos[id(next_poi)], spd) if (next_poi and spd > 0) else None
+            eta_end = _eta_m(cur.dt, cur_m, poi_pos[id(end_poi)], spd) if (end_poi and spd > 0) else None
 
-        notif = infer_notification_type(
+        if route_idx.monotone:
+            # On a sorted route, if any POI is within tolerance of cur then prev_poi or next_poi is.
+            passage_pos = [poi_pos[id(p)] for p in (prev_poi, next_poi) if p is not None]
+        else:
+            passage_pos = route_idx.pos
+        notif = _infer_notification_type_m(
             state=state,
             pig_event=pig_event,
-            cur=cur,
+            now=cur.dt,
+            cur_m=cur_m,
             legacy_route=legacy,
-            route=route,
+            poi_positions=passage_pos,
             next_poi=next_poi,
-            end_poi=end_poi,
-            gaps=gaps,
+            end_m=poi_pos[id(end_poi)] if end_poi else None,
+            gaps=_near_gaps(self._gap_index[legacy], cur_m, tol) if legacy in self._gap_index else [],
             eta_next=eta_next,
-            gc_to_kp=gc_to_kp,
-            cfg=cfg,
+            tol=tol,
+            prepoi_window=self._prepoi_window,
         )
 
-        self.repo.save_state(pig_id, state)
-
         computed_kp = cur.kp
         if computed_kp is None and cur.gc is not None:
             computed_kp = gc_to_kp.get(cur.gc)
 
-        return build_payload(
+        payload = build_payload(
             pig_id=pig_id,
             tool_type=effective_tool,
             pig_event=pig_event,
@@ -495,3 +816,4 @@ class Engine:
             current_kp=computed_kp,
             time=cur.dt,
         )
+        return payload, True
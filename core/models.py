@@ -5,7 +5,7 @@ from datetime import datetime
 from typing import Optional
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PosSample:
     """One telemetry point for a PIG."""
     dt: datetime
@@ -14,7 +14,7 @@ class PosSample:
     tool_type: Optional[str] = None # Tool Type
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class POI:
     """Point of Interest (valve) metadata."""
     tag: str
@@ -24,7 +24,7 @@ class POI:
     legacy_route: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class GapPoint:
     """Gap boundary in a legacy route."""
     legacy_route: str
@@ -32,7 +32,7 @@ class GapPoint:
     kp: float
 
 
-@dataclass
+@dataclass(slots=True)
 class PigState:
     """Persisted per pig_id to make decisions consistent across runs."""
 
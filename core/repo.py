@@ -2,9 +2,15 @@ from __future__ import annotations
 
 import csv
 import os
+import pickle
+import sys
+from itertools import groupby
+from bisect import bisect_left
 from datetime import datetime
-from typing import Dict, List, Protocol, Optional, Any
-from dataclasses import asdict
+from functools import lru_cache
+from operator import attrgetter
+from typing import Dict, List, Protocol, Optional, Any, Tuple
+from dataclasses import fields
 
 from core import state
 from core.models import POI, GapPoint, PosSample, PigState
@@ -20,40 +26,115 @@ class TelemetryRepo(Protocol):
     def get_pois(self) -> List[POI]: ...
     def get_gaps(self) -> List[GapPoint]: ...
 
-    def get_recent_positions(self, pig_id: str, since_dt: datetime) -> List[PosSample]: ...
+    def get_recent_positions(self, pig_id: str, since_dt: datetime) -> List[PosSample]:
+        """Samples with dt >= since_dt, sorted by dt ascending (the engine relies on this).
+
+        Samples with equal dt stay in arrival order (Postgres: by id); the engine takes the
+        first of them as the current/reference sample.
+        """
+        ...
+
+    def get_recent_positions_batch(self, pig_ids: List[str], since_dt: datetime) -> Dict[str, List[PosSample]]:
+        """get_recent_positions for several pigs at once; every requested pig_id gets a key."""
+        ...
 
     def get_state(self, pig_id: str) -> PigState: ...
     def save_state(self, pig_id: str, state: PigState) -> None: ...
 
 
-def _pick(row: dict, keys: List[str]) -> str:
-    for k in keys:
-        if k in row and (row.get(k) or "").strip():
-            return (row.get(k) or "").strip()
+def _columns(header: List[str], keys: List[str]) -> List[int]:
+    """Indexes of the header columns named by `keys`, in alias order (resolved once per file)."""
+    pos = {name: i for i, name in enumerate(header)}  # duplicate names: last wins, like DictReader
+    return [pos[k] for k in keys if k in pos]
+
+
+def _pick(row: List[str], cols: List[int]) -> str:
+    """First non-blank value among the resolved alias columns."""
+    for i in cols:
+        if i < len(row):
+            v = row[i].strip()
+            if v:
+                return v
     return ""
 
 
+_sample_dt = attrgetter("dt")
+
+
+class TelemetryBuffer:
+    """Time-ordered samples for one pig (in-memory / demo telemetry).
+
+    Sorted once on load; "since T" is a binary search + slice. Samples with equal dt keep
+    their input order.
+    """
+
+    def __init__(self, samples: List[PosSample]) -> None:
+        self._samples: List[PosSample] = sorted(samples, key=_sample_dt)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def since(self, since_dt: datetime) -> List[PosSample]:
+        i = bisect_left(self._samples, since_dt, key=_sample_dt)
+        return self._samples[i:]
+
+
 class CsvRepo:
     """CSV implementation:
     - POI.csv
     - GCtoKP.csv
     - gap.csv  (legacy route name, gap start/gap end, kp)
     All are expected to be in root_dir.
-    Telemetry is demo-only (set_demo_telemetry)."""
+    Telemetry is demo-only (set_demo_telemetry).
+
+    cache_path: optional pickle file holding the parsed tables; reused while the CSVs'
+    paths, mtimes and sizes are unchanged, rewritten otherwise."""
 
-    def __init__(self, root_dir: str = ".") -> None:
+    _CACHE_VERSION = 1
+
+    def __init__(self, root_dir: str = ".", cache_path: Optional[str] = None) -> None:
         self.root_dir = root_dir
+        self.cache_path = cache_path
         self._gc_to_kp: Dict[int, float] = {}
         self._pois: List[POI] = []
         self._gaps: List[GapPoint] = []
         self._state = InMemoryStateStore()
-        self._telemetry: Dict[str, List[PosSample]] = {}
+        self._telemetry: Dict[str, TelemetryBuffer] = {}
         self._load_all()
 
     def _load_all(self) -> None:
-        self._gc_to_kp = self._load_gc_to_kp(os.path.join(self.root_dir, "gctokp.csv"))
-        self._pois = self._load_pois(os.path.join(self.root_dir, "poi.csv"))
-        self._gaps = self._load_gaps(os.path.join(self.root_dir, "gap.csv"))
+        paths = [os.path.join(self.root_dir, name) for name in ("gctokp.csv", "poi.csv", "gap.csv")]
+        sig = (self._CACHE_VERSION, tuple((os.path.abspath(p), _file_sig(p)) for p in paths))
+        cached = self._read_cache(sig)
+        if cached is not None:
+            self._gc_to_kp, self._pois, self._gaps = cached
+            return
+
+        self._gc_to_kp = self._load_gc_to_kp(paths[0])
+        self._pois = self._load_pois(paths[1])
+        self._gaps = self._load_gaps(paths[2])
+        self._write_cache(sig)
+
+    def _read_cache(self, sig: tuple) -> Optional[tuple]:
+        if not self.cache_path:
+            return None
+        try:
+            with open(self.cache_path, "rb") as f:
+                stored_sig, data = pickle.load(f)
+        except Exception:
+            return None  # missing/corrupt/stale format: just re-parse
+        return data if stored_sig == sig else None
+
+    def _write_cache(self, sig: tuple) -> None:
+        if not self.cache_path:
+            return
+        tmp = f"{self.cache_path}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump((sig, (self._gc_to_kp, self._pois, self._gaps)), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            pass  # the cache is an optimisation only
 
     def get_gc_to_kp(self) -> Dict[int, float]:
         return self._gc_to_kp
@@ -66,11 +147,16 @@ class CsvRepo:
 
     # --- demo telemetry (replace with Postgres later) ---
     def set_demo_telemetry(self, pig_id: str, samples: List[PosSample]) -> None:
-        self._telemetry[pig_id] = sorted(samples, key=lambda s: s.dt)
+        self._telemetry[pig_id] = TelemetryBuffer(samples)
 
     def get_recent_positions(self, pig_id: str, since_dt: datetime) -> List[PosSample]:
-        samples = self._telemetry.get(pig_id, [])
-        return [s for s in samples if s.dt >= since_dt]
+        buf = self._telemetry.get(pig_id)
+        if buf is None:
+            return []
+        return buf.since(since_dt)
+
+    def get_recent_positions_batch(self, pig_ids: List[str], since_dt: datetime) -> Dict[str, List[PosSample]]:
+        return {pig_id: self.get_recent_positions(pig_id, since_dt) for pig_id in pig_ids}
 
     def get_state(self, pig_id: str) -> PigState:
         return self._state.get(pig_id)
@@ -85,9 +171,13 @@ class CsvRepo:
             return {}
         m: Dict[int, float] = {}
         with open(path, "r", newline="", encoding="utf-8-sig") as f:
-            for row in csv.DictReader(f):
-                gc_s = _pick(row, ["Global Channel", "GC"])
-                kp_s = _pick(row, ["KP", "matched_kp", "kp"])
+            reader = csv.reader(f)
+            header = next(reader, None) or []
+            gc_cols = _columns(header, ["Global Channel", "GC"])
+            kp_cols = _columns(header, ["KP", "matched_kp", "kp"])
+            for row in reader:
+                gc_s = _pick(row, gc_cols)
+                kp_s = _pick(row, kp_cols)
                 if not gc_s or not kp_s:
                     continue
                 try:
@@ -102,15 +192,22 @@ class CsvRepo:
             return []
         out: List[POI] = []
         with open(path, "r", newline="", encoding="utf-8-sig") as f:
-            for row in csv.DictReader(f):
-                tag = _pick(row, ["Valve Tag", "Tag"])
+            reader = csv.reader(f)
+            header = next(reader, None) or []
+            tag_cols = _columns(header, ["Valve Tag", "Tag"])
+            legacy_cols = _columns(header, ["Legacy Route Name", "Legacy Route", "Legacy"])
+            vt_cols = _columns(header, ["Valve Type", "Type"])
+            gc_cols = _columns(header, ["Global Channel", "GC"])
+            kp_cols = _columns(header, ["KP", "matched_kp", "kp"])
+            for row in reader:
+                tag = _pick(row, tag_cols)
                 if not tag:
                     continue
-                legacy_row = _pick(row, ["Legacy Route Name", "Legacy Route", "Legacy"]) or "Unknown"
+                legacy_row = _pick(row, legacy_cols) or "Unknown"
                 legacy = _norm_legacy(legacy_row)
-                vt = _pick(row, ["Valve Type", "Type"])
-                gc_s = _pick(row, ["Global Channel", "GC"])
-                kp_s = _pick(row, ["KP", "matched_kp", "kp"])
+                vt = _pick(row, vt_cols)
+                gc_s = _pick(row, gc_cols)
+                kp_s = _pick(row, kp_cols)
 
                 gc = None
                 kp = None
@@ -135,11 +232,16 @@ class CsvRepo:
             return []
         out: List[GapPoint] = []
         with open(path, "r", newline="", encoding="utf-8-sig") as f:
-            for row in csv.DictReader(f):
-                legacy_row = _pick(row, ["Legacy Route Name", "Legacy Route", "legacy_route", "route"]) or "Unknown"
+            reader = csv.reader(f)
+            header = next(reader, None) or []
+            legacy_cols = _columns(header, ["Legacy Route Name", "Legacy Route", "legacy_route", "route"])
+            kind_cols = _columns(header, ["Gap", "Gap Type", "gap", "kind"])
+            kp_cols = _columns(header, ["KP", "kp"])
+            for row in reader:
+                legacy_row = _pick(row, legacy_cols) or "Unknown"
                 legacy = _norm_legacy(legacy_row)
-                kind_raw = _pick(row, ["Gap", "Gap Type", "gap", "kind"]).strip().lower()
-                kp_s = _pick(row, ["KP", "kp"])
+                kind_raw = _pick(row, kind_cols).strip().lower()
+                kp_s = _pick(row, kp_cols)
                 if not kp_s:
                     continue
                 try:
@@ -160,6 +262,24 @@ class PostgresRepo:
     def __init__(self, dsn: str, root_dir: str=".") -> None:
         self.dsn = dsn
         self._csv = CsvRepo(root_dir=root_dir)
+        self._conn: Optional[psycopg.Connection] = None
+
+    def _connection(self) -> psycopg.Connection:
+        """One long-lived autocommit connection, reopened if it was closed or broke.
+
+        Every call below is a single statement, so autocommit keeps them atomic without
+        leaving an idle transaction open between ticks; psycopg also auto-prepares
+        statements that repeat on the same connection.
+        """
+        conn = self._conn
+        if conn is None or conn.closed or conn.broken:
+            conn = self._conn = psycopg.connect(self.dsn, autocommit=True)
+        return conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
 
     def get_gc_to_kp(self) -> Dict[int, float]:
         return self._csv.get_gc_to_kp()
@@ -175,23 +295,35 @@ class PostgresRepo:
         SELECT ts, gc, kp, tool_type
         FROM pig_positions
         WHERE pig_id = %s AND ts >= %s
-        ORDER BY ts ASC
+        ORDER BY ts ASC, id ASC
+        """
+        # Build samples straight off the cursor: no intermediate fetchall() list of row tuples.
+        with self._connection().cursor() as cur:
+            cur.execute(sql, (pig_id, since_dt))
+            return [PosSample(dt=ts, gc=gc, kp=kp, tool_type=tool_type) for ts, gc, kp, tool_type in cur]
+
+    def get_recent_positions_batch(self, pig_ids: List[str], since_dt: datetime) -> Dict[str, List[PosSample]]:
+        """One round-trip for many pigs instead of one query per pig."""
+        sql = """
+        SELECT pig_id, ts, gc, kp, tool_type
+        FROM pig_positions
+        WHERE pig_id = ANY(%s) AND ts >= %s
+        ORDER BY pig_id ASC, ts ASC, id ASC
         """
-        out: List[PosSample] = []
-        with psycopg.connect(self.dsn) as conn:
-            with conn.cursor() as cur:
-                cur.execute(sql, (pig_id, since_dt))
-                rows = cur.fetchall()
-                for ts, gc, kp, tool_type in rows:
-                    out.append(PosSample(dt=ts, gc=gc, kp=kp, tool_type=tool_type))
+        out: Dict[str, List[PosSample]] = {pig_id: [] for pig_id in pig_ids}
+        if not pig_ids:
+            return out
+        with self._connection().cursor() as cur:
+            cur.execute(sql, (list(pig_ids), since_dt))
+            for pig_id, group in groupby(cur, key=lambda r: r[0]):
+                out[pig_id] = [PosSample(dt=ts, gc=gc, kp=kp, tool_type=tool_type) for _, ts, gc, kp, tool_type in group]
         return out
 
     def get_state(self, pig_id: str) -> PigState:
         sql = "SELECT state_json FROM pig_state WHERE pig_id = %s"
-        with psycopg.connect(self.dsn) as conn:
-            with conn.cursor() as cur:
-                cur.execute(sql, (pig_id,))
-                row = cur.fetchone()
+        with self._connection().cursor() as cur:
+            cur.execute(sql, (pig_id,))
+            row = cur.fetchone()
         if not row:
             return PigState()
         
@@ -214,11 +346,9 @@ class PostgresRepo:
         ON CONFLICT (pig_id) 
         DO UPDATE set state_json = EXCLUDED.state_json, updated_at = NOW()
         """
-        payload = json.dumps(asdict(state), default=str)
-        with psycopg.connect(self.dsn) as conn:
-            with conn.cursor() as cur:
-                cur.execute(sql, (pig_id, payload))
-            conn.commit()
+        payload = _state_json(state)
+        with self._connection().cursor() as cur:
+            cur.execute(sql, (pig_id, payload))
             
     def list_active_pigs(self, since_dt: datetime) -> List[str]:
         sql = """
@@ -227,10 +357,9 @@ class PostgresRepo:
         WHERE ts >= %s
         ORDER BY pig_id ASC
         """
-        with psycopg.connect(self.dsn) as conn:
-            with conn.cursor() as cur:
-                cur.execute(sql, (since_dt,))
-                rows = cur.fetchall()
+        with self._connection().cursor() as cur:
+            cur.execute(sql, (since_dt,))
+            rows = cur.fetchall()
 
         return [row[0] for row in rows]
     
@@ -248,22 +377,40 @@ class PostgresRepo:
         returning id
         """
         payload_json = json.dumps(payload, default=str)
-        with psycopg.connect(self.dsn) as conn:
-            with conn.cursor() as cur:
-                cur.execute(sql, (dedup_key, pig_id, notif_type, payload_json))
-                row = cur.fetchone()
-            conn.commit()
+        with self._connection().cursor() as cur:
+            cur.execute(sql, (dedup_key, pig_id, notif_type, payload_json))
+            row = cur.fetchone()
         return row is not None
 
 
+def _file_sig(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+_STATE_FIELDS = tuple(f.name for f in fields(PigState))
+
+
+def _state_json(state: PigState) -> str:
+    """Same JSON as json.dumps(asdict(state), default=str), without asdict's deep copies."""
+    return json.dumps({k: getattr(state, k) for k in _STATE_FIELDS}, default=str)
+
+
 def _parse_dt(v):
     if isinstance(v, str):
         return datetime.fromisoformat(v)
     return v
 
+@lru_cache(maxsize=4096)
 def _norm_legacy(s: str) -> str:
     # Keep names consistent with engine expectations ("Unknown").
-    return (s or "").strip() or "Unknown"
+    # Interned so route-name comparisons across POIs, gaps and state hit the identity fast path;
+    # memoized because a few route names repeat across every POI/gap row.
+    return sys.intern((s or "").strip() or "Unknown")
 
 def _parse_payload_ts(payload: Dict[str, Any]) -> Optional[datetime]:
     """Parse payload['Timestamp'] which is formatted as '%d-%m-%y %H%M%S'."""
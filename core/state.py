@@ -1,19 +1,35 @@
 from __future__ import annotations
 
-from typing import Dict
+from collections import OrderedDict
 from core.models import PigState
 
 
 class InMemoryStateStore:
-    """Temporary state store (development). Replace with Postgres later."""
+    """Temporary state store (development). Replace with Postgres later.
 
-    def __init__(self) -> None:
-        self._by_pig: Dict[str, PigState] = {}
+    Bounded LRU: once more than ``max_size`` pigs are held, the least recently
+    used state is dropped.
+    """
+
+    def __init__(self, max_size: int = 100_000) -> None:
+        self.max_size = max_size
+        self._by_pig: OrderedDict[str, PigState] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
 
     def get(self, pig_id: str) -> PigState:
-        if pig_id not in self._by_pig:
-            self._by_pig[pig_id] = PigState()
-        return self._by_pig[pig_id]
+        state = self._by_pig.get(pig_id)
+        if state is not None:
+            self.hits += 1
+            self._by_pig.move_to_end(pig_id)
+            return state
+        self.misses += 1
+        state = PigState()
+        self.upsert(pig_id, state)
+        return state
 
     def upsert(self, pig_id: str, state: PigState) -> None:
         self._by_pig[pig_id] = state
+        self._by_pig.move_to_end(pig_id)
+        if len(self._by_pig) > self.max_size:
+            self._by_pig.popitem(last=False)
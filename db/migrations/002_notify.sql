@@ -0,0 +1,23 @@
+-- =========
+-- Wake-up notifications
+-- =========
+-- Workers LISTEN on these channels instead of sleeping a fixed interval.
+-- Postgres folds identical notifications within a transaction into one.
+
+create or replace function notify_channel() returns trigger
+language plpgsql as $$
+begin
+  perform pg_notify(tg_argv[0], '');
+  return null;
+end;
+$$;
+
+create or replace trigger trg_pig_positions_notify
+  after insert on pig_positions
+  for each statement execute function notify_channel('pig_event');
+
+-- Row-level: an INSERT ... ON CONFLICT DO NOTHING that inserts nothing (a
+-- duplicate enqueue) must not wake the senders.
+create or replace trigger trg_notifications_outbox_notify
+  after insert on notifications_outbox
+  for each row execute function notify_channel('outbox_event');
@@ -1,7 +1,10 @@
 import json
+import logging
 import os
 import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import List, Sequence, Tuple
@@ -10,6 +13,9 @@ import psycopg
 import requests
 
 
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(name)s %(message)s")
+log = logging.getLogger("sender")
+
 MST = timezone(timedelta(hours=-7), name="MST")
 
 @dataclass
@@ -45,7 +51,15 @@ class OutboxSender:
         self.dsn = dsn
         self.endpoint_url = endpoint_url
         self.worker_name = worker_name
-        self.session = requests.Session()
+        # one Session per sending thread: requests does not promise Session is thread-safe
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
 
     def reclaim_stale_sending(self, conn: psycopg.Connection, stale_seconds: int = 300) -> int:
         """Move stuck SENDING rows back to RETRY (e.g., if a worker crashed)."""
@@ -203,12 +217,19 @@ class OutboxSender:
         stale_seconds: int = 300,
         reclaim_every_loops: int = 10,
     ) -> None:
-        print(f"[sender] start {utcnow().isoformat()} worker={self.worker_name}", flush=True)
+        log.info("start %s worker=%s", utcnow().isoformat(), self.worker_name)
 
+        # sends are I/O bound: overlap one batch's POSTs (each pool thread keeps its own session)
         loops = 0
-        with psycopg.connect(self.dsn) as conn:
+        with psycopg.connect(self.dsn) as conn, ThreadPoolExecutor(max_workers=max(1, batch_size)) as pool:
             # keep one connection open; psycopg will reconnect on hard failure only if you implement it
             # (simple and good enough for dev)
+
+            # wake as soon as the detector enqueues (see db/migrations/002_notify.sql);
+            # sleep_seconds remains the ceiling so due retries are still picked up
+            with conn.transaction():
+                conn.execute("LISTEN outbox_event")
+
             while True:
                 loops += 1
 
@@ -217,12 +238,13 @@ class OutboxSender:
                     if loops % max(1, reclaim_every_loops) == 0:
                         reclaimed = self.reclaim_stale_sending(conn, stale_seconds=stale_seconds)
                         if reclaimed:
-                            print(f"[sender] reclaimed={reclaimed}", flush=True)
+                            log.info("reclaimed=%s", reclaimed)
 
                     items = self.claim_batch(conn, batch_size=batch_size)
 
                 if not items:
-                    time.sleep(sleep_seconds)
+                    for _ in conn.notifies(timeout=sleep_seconds, stop_after=1):
+                        pass
                     continue
 
                 # 2) send outside the transaction
@@ -230,24 +252,24 @@ class OutboxSender:
                 retry_rows: List[Tuple[int, int, int, str]] = []
                 dead_rows: List[Tuple[int, int, str]] = []
 
-                for item in items:
-                    ok, info = self.send_one(item)
+                for item, (ok, info) in zip(items, pool.map(self.send_one, items)):
                     if ok:
                         sent_ids.append(item.id)
-                        print(f"[SENT] id={item.id} key={item.dedup_key} {info}", flush=True)
+                        log.debug("[SENT] id=%s key=%s %s", item.id, item.dedup_key, info)
                         continue
 
                     next_attempt_count = item.attempt_count + 1
                     if next_attempt_count >= max_attempts:
                         dead_rows.append((item.id, next_attempt_count, info))
-                        print(f"[DEAD] id={item.id} key={item.dedup_key} {info}", flush=True)
+                        log.error("[DEAD] id=%s key=%s %s", item.id, item.dedup_key, info)
                     else:
                         backoff = compute_backoff_seconds(next_attempt_count)
                         retry_rows.append((item.id, next_attempt_count, backoff, info))
-                        print(f"[RETRY] id={item.id} key={item.dedup_key} in={backoff}s {info}", flush=True)
+                        log.warning("[RETRY] id=%s key=%s in=%ss %s", item.id, item.dedup_key, backoff, info)
 
-                # 3) persist results in one transaction
-                with conn.transaction():
+                # 3) persist results in one transaction; pipeline mode streams the
+                # UPDATEs without waiting for each reply
+                with conn.pipeline(), conn.transaction():
                     self._mark_sent_many(conn, sent_ids)
                     self._mark_retry_many(conn, retry_rows)
                     self._mark_dead_many(conn, dead_rows)
@@ -264,7 +286,7 @@ def main() -> None:
     with psycopg.connect(dsn) as conn:
         with conn.cursor() as cur:
             cur.execute("select current_database(), current_schema(), inet_server_addr(), inet_server_port()")
-            print("[sender] DB info:", cur.fetchone(), flush=True)
+            log.info("DB info: %s", cur.fetchone())
 
     sender.run_forever(
         batch_size=int(os.getenv("AUTO_SENDER_BATCH", "5")),
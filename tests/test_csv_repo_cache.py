@@ -0,0 +1,48 @@
+import os
+
+from core.repo import CsvRepo
+
+
+def _write_pois(root, rows):
+    (root / "poi.csv").write_text(
+        "Valve Tag,Valve Type,Global Channel,KP,Legacy Route Name\n" + "".join(rows),
+        encoding="utf-8",
+    )
+
+
+def test_csv_repo_reuses_cache_while_files_unchanged(tmp_path, monkeypatch):
+    _write_pois(tmp_path, ["V1,Block,,1.000,Route_Test\n"])
+    cache = str(tmp_path / "ref.pkl")
+
+    first = CsvRepo(root_dir=tmp_path, cache_path=cache)
+    assert os.path.exists(cache)
+
+    def _boom(path):
+        raise AssertionError("CSV re-parsed despite a fresh cache")
+
+    monkeypatch.setattr(CsvRepo, "_load_pois", staticmethod(_boom))
+    second = CsvRepo(root_dir=tmp_path, cache_path=cache)
+    assert second.get_pois() == first.get_pois()
+
+
+def test_csv_repo_cache_invalidated_when_csv_changes(tmp_path):
+    _write_pois(tmp_path, ["V1,Block,,1.000,Route_Test\n"])
+    cache = str(tmp_path / "ref.pkl")
+    CsvRepo(root_dir=tmp_path, cache_path=cache)
+
+    _write_pois(tmp_path, ["V1,Block,,1.000,Route_Test\n", "V2,End,,2.000,Route_Test\n"])
+    repo = CsvRepo(root_dir=tmp_path, cache_path=cache)
+    assert [p.tag for p in repo.get_pois()] == ["V1", "V2"]
+
+
+def test_csv_repo_cache_not_shared_between_root_dirs(tmp_path):
+    cache = str(tmp_path / "ref.pkl")
+    a, b = tmp_path / "a", tmp_path / "b"
+    a.mkdir()
+    b.mkdir()
+    _write_pois(a, ["VA,Block,,1.000,Route_Test\n"])
+    _write_pois(b, ["VB,Block,,1.000,Route_Test\n"])
+    os.utime(b / "poi.csv", ns=(os.stat(a / "poi.csv").st_mtime_ns,) * 2)  # same mtime and size
+
+    CsvRepo(root_dir=a, cache_path=cache)
+    assert [p.tag for p in CsvRepo(root_dir=b, cache_path=cache).get_pois()] == ["VB"]
@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from core.engine import Engine
+from core.models import PosSample
+from core.repo import CsvRepo
+
+from tests.conftest import dt
+
+
+def _repo(tmp_path):
+    (tmp_path / "poi.csv").write_text(
+        "Valve Tag,Valve Type,Global Channel,KP,Legacy Route Name\n"
+        "V1,Block,,1.000,Route_Test\n"
+        "V2,Block,,2.000,Route_Test\n"
+        "V3,End,,3.000,Route_Test\n",
+        encoding="utf-8",
+    )
+    return CsvRepo(root_dir=tmp_path)
+
+
+def _series(base):
+    return [PosSample(dt=base + timedelta(minutes=m), kp=0.95 + 0.02 * m) for m in range(90)]
+
+
+def test_process_pig_batch_matches_sequential_ticks(tmp_path):
+    base = dt(8, 0)
+    series = _series(base)
+    ticks = [base + timedelta(minutes=m, seconds=5) for m in range(0, 90, 3)]
+
+    seq_repo = _repo(tmp_path)
+    seq_engine = Engine(seq_repo)
+    expected = []
+    for now in ticks:
+        seq_repo.set_demo_telemetry("PIG_001", [s for s in series if s.dt <= now])
+        expected.append(seq_engine.process_pig("PIG_001", "Tool", now))
+
+    batch_repo = _repo(tmp_path)
+    batch_repo.set_demo_telemetry("PIG_001", series)
+    got = Engine(batch_repo).process_pig_batch("PIG_001", "Tool", ticks)
+
+    assert got == expected
+    assert batch_repo.get_state("PIG_001") == seq_repo.get_state("PIG_001")
+
+
+def test_process_pig_batch_empty(tmp_path):
+    assert Engine(_repo(tmp_path)).process_pig_batch("PIG_001", "Tool", []) == []
+
+
+def test_process_pigs_matches_process_pig(tmp_path):
+    base = dt(8, 0)
+    now = base + timedelta(minutes=40)
+    telemetry = {
+        "PIG_A": [s for s in _series(base) if s.dt <= now],
+        "PIG_B": [PosSample(dt=base + timedelta(minutes=m), kp=1.5) for m in range(41)],
+    }
+    pigs = [("PIG_A", "Tool"), ("PIG_B", "Tool"), ("PIG_NONE", "Tool")]
+
+    one_repo = _repo(tmp_path)
+    many_repo = _repo(tmp_path)
+    for repo in (one_repo, many_repo):
+        for pig_id, samples in telemetry.items():
+            repo.set_demo_telemetry(pig_id, samples)
+
+    one_engine = Engine(one_repo)
+    expected = [one_engine.process_pig(pig_id, tool, now) for pig_id, tool in pigs]
+
+    assert list(Engine(many_repo).process_pigs(pigs, now)) == [(pig_id, p) for (pig_id, _), p in zip(pigs, expected)]
+    for pig_id, _ in pigs:
+        assert many_repo.get_state(pig_id) == one_repo.get_state(pig_id)
+
+
+def test_process_pigs_saves_each_pig_only_when_yielded(tmp_path):
+    base = dt(8, 0)
+    now = base + timedelta(minutes=10)
+    repo = _repo(tmp_path)
+    for pig_id in ("PIG_A", "PIG_B"):
+        repo.set_demo_telemetry(pig_id, [PosSample(dt=base + timedelta(minutes=m), kp=1.5) for m in range(11)])
+
+    it = Engine(repo).process_pigs([("PIG_A", "Tool"), ("PIG_B", "Tool")], now)
+    assert next(it)[0] == "PIG_A"
+    assert repo.get_state("PIG_A").last_event_dt is not None
+    assert repo.get_state("PIG_B").last_event_dt is None
@@ -2,8 +2,8 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
 
-from core.engine import _pos_m, _current_sample, pick_ref_sample_at_or_before, speed_mps_by_ref, EngineConfig
-from core.models import PosSample
+from core.engine import _fmt_ts, _gap_index, _near_gaps, _pos_m, _current_sample, pick_ref_sample_at_or_before, speed_mps_by_ref, EngineConfig
+from core.models import GapPoint, PosSample
 from tests.conftest import dt, import_engine_models
 
 MST = timezone(timedelta(hours=-7), name="MST")
@@ -35,6 +35,38 @@ def test_pick_ref_sample_at_or_before_prefers_left_side():
     ref = pick_ref_sample_at_or_before([s_old, s_near_left, s_right], target)
     assert ref == s_near_left
 
+def test_pick_ref_sample_at_or_before_falls_back_to_oldest():
+    target = dt(8, 0)
+    s1 = PosSample(dt=dt(8, 2), gc=100)
+    s2 = PosSample(dt=dt(8, 5), gc=101)
+    assert pick_ref_sample_at_or_before([s1, s2], target) == s1
+
+def test_tied_timestamps_resolve_to_first_sample():
+    a = PosSample(dt=dt(8, 0), gc=100)
+    b = PosSample(dt=dt(8, 5), gc=101)
+    c = PosSample(dt=dt(8, 5), gc=102)
+    assert _current_sample([a, b, c]) is b
+    assert pick_ref_sample_at_or_before([a, b, c], dt(8, 7)) is b
+
+def test_fmt_ts_matches_strftime():
+    for t in (dt(8, 5, 9), datetime(2009, 12, 31, 23, 59, 58), datetime(2100, 1, 2, 0, 0, 0)):
+        assert _fmt_ts(t) == t.strftime("%d-%m-%y %H%M%S")
+
+def test_near_gaps_keeps_file_order_and_window():
+    gaps = [
+        GapPoint(legacy_route="L1", kind="end", kp=10.02),
+        GapPoint(legacy_route="L1", kind="start", kp=5.0),
+        GapPoint(legacy_route="L1", kind="start", kp=9.99),
+        GapPoint(legacy_route="L1", kind="end", kp=20.0),
+    ]
+    gi = _gap_index(gaps)
+    for cur_m in (0.0, 5030.0, 9990.0, 10000.0, 10060.0, 20050.0, 30000.0):
+        within = [g for g in gaps if abs(cur_m - g.kp * 1000.0) <= 50.0]
+        near = _near_gaps(gi, cur_m, 50.0)
+        # same matches, same (file) order as scanning every gap
+        assert [g for g in near if abs(cur_m - g.kp * 1000.0) <= 50.0] == within
+    assert _near_gaps(gi, None, 50.0) == []
+
 def test_speed_mps_by_ref_basic():
     cfg = EngineConfig(meters_per_channel=25)
     gc_to_kp = {100: 1.0, 101: 1.1}
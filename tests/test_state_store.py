@@ -0,0 +1,15 @@
+from core.models import PigState
+from core.state import InMemoryStateStore
+
+
+def test_state_store_evicts_least_recently_used():
+    store = InMemoryStateStore(max_size=2)
+    a = PigState(locked_legacy_route="A")
+    store.upsert("P1", a)
+    store.upsert("P2", PigState())
+    assert store.get("P1") is a  # P1 now most recent
+    store.upsert("P3", PigState())
+
+    assert store.get("P1") is a
+    assert store.get("P2") == PigState()  # evicted, recreated fresh
+    assert (store.hits, store.misses) == (2, 1)
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from core.models import PosSample
+from core.repo import CsvRepo, TelemetryBuffer
+
+from tests.conftest import dt
+
+
+def test_buffer_since_returns_sorted_tail():
+    base = dt(8, 0)
+    buf = TelemetryBuffer([PosSample(dt=base + timedelta(seconds=s), kp=s / 60) for s in (180, 0, 120, 60, 90)])
+
+    out = buf.since(base + timedelta(minutes=1))
+    assert [s.kp for s in out] == [1.0, 1.5, 2.0, 3.0]
+
+
+def test_set_demo_telemetry_keeps_every_sample(tmp_path):
+    repo = CsvRepo(root_dir=tmp_path)
+    base = dt(8, 0)
+    repo.set_demo_telemetry("PIG_001", [PosSample(dt=base + timedelta(seconds=10 * i), kp=float(i)) for i in range(6000)])
+
+    assert repo.get_recent_positions("PIG_001", base)[0].kp == 0.0
+    assert len(repo.get_recent_positions("PIG_001", base)) == 6000
+
+
+def test_csv_repo_recent_positions_uses_buffer(tmp_path):
+    repo = CsvRepo(root_dir=tmp_path)
+    base = dt(8, 0)
+    repo.set_demo_telemetry("PIG_001", [PosSample(dt=base, kp=1.0), PosSample(dt=base + timedelta(minutes=5), kp=2.0)])
+
+    assert [s.kp for s in repo.get_recent_positions("PIG_001", base + timedelta(minutes=1))] == [2.0]
+    assert repo.get_recent_positions("PIG_404", base) == []
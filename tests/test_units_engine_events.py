@@ -1,9 +1,12 @@
 from datetime import datetime, timedelta, timezone
 from core.engine import (
     EngineConfig,
+    find_prev_next_end,
+    pick_legacy_route,
     infer_pig_event,
     eta_from_to,
     infer_notification_type,
+    _infer_notification_type_m,
 )
 
 from core.models import PosSample, POI, GapPoint, PigState
@@ -112,6 +115,47 @@ def test_infer_pig_event_completed_if_close_to_end_poi_overrides():
     )
     assert event == "Completed"
 
+# find_prev_next_end
+
+def test_find_prev_next_end_brackets_current_position():
+    cfg = _cfg()
+    route = [_poi("V1", 9.0), _poi("V2", 10.0), _poi("V3", 11.0), _poi("END", 12.0)]
+
+    prev, nxt, end = find_prev_next_end(route, PosSample(dt=dt(8, 0), kp=10.5), {}, cfg)
+    assert (prev.tag, nxt.tag, end.tag) == ("V2", "V3", "END")
+
+    # within tolerance of V3 -> V3 counts as passed
+    prev, nxt, _ = find_prev_next_end(route, PosSample(dt=dt(8, 0), kp=10.98), {}, cfg)
+    assert (prev.tag, nxt.tag) == ("V3", "END")
+
+    prev, nxt, _ = find_prev_next_end(route, PosSample(dt=dt(8, 0), kp=8.0), {}, cfg)
+    assert prev is None and nxt.tag == "V1"
+
+def test_find_prev_next_end_skips_pois_without_position():
+    cfg = _cfg()
+    route = [_poi("V1", 9.0), _poi("NOPOS", None), _poi("V3", 11.0)]
+
+    prev, nxt, end = find_prev_next_end(route, PosSample(dt=dt(8, 0), kp=10.0), {}, cfg)
+    assert (prev.tag, nxt.tag, end.tag) == ("V1", "V3", "V3")
+
+# pick_legacy_route
+
+def test_pick_legacy_route_prefers_narrowest_then_name():
+    cfg = _cfg()
+    routes = {
+        "WIDE": [_poi("W1", 0.0, legacy="WIDE"), _poi("W2", 20.0, legacy="WIDE")],
+        "B": [_poi("B1", 9.0, legacy="B"), _poi("B2", 11.0, legacy="B")],
+        "A": [_poi("A1", 9.5, legacy="A"), _poi("A2", 11.5, legacy="A")],
+    }
+    cur = PosSample(dt=dt(8, 0), kp=10.0)
+
+    state = PigState()
+    assert pick_legacy_route(state, routes, cur, {}, cfg, pig_event="Moving") == "A"
+    assert state.locked_legacy_route == "A"
+
+    far = PosSample(dt=dt(8, 0), kp=100.0)
+    assert pick_legacy_route(PigState(), routes, far, {}, cfg, pig_event="Moving") == "Unknown"
+
 # eta_from_to
 
 def test_eta_from_to_none_if_speed_zero():
@@ -185,6 +229,28 @@ def test_notif_type_poi_passage_before_gap_and_updates():
     )
     assert notif == "POI Passage"
 
+def test_notif_type_m_checks_only_given_poi_positions():
+    cur = PosSample(dt=dt(hh=8, mm=0), kp=10.0)
+
+    def notif(poi_positions):
+        return _infer_notification_type_m(
+            state=PigState(),
+            pig_event="Moving",
+            now=cur.dt,
+            cur_m=10000.0,
+            legacy_route="L1",
+            poi_positions=poi_positions,
+            next_poi=_poi("V2", 11.0),
+            end_m=11000.0,
+            gaps=[],
+            eta_next=None,
+            tol=50.0,
+            prepoi_window=timedelta(seconds=60),
+        )
+
+    assert notif([10000.0, 11000.0]) == "POI Passage"
+    assert notif([9000.0, None]) != "POI Passage"
+
 def test_notif_type_gap_start_end():
     cfg = _cfg()
     state = PigState()